@@ -1,139 +1,370 @@
 import streamlit as st
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 import re
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from functools import lru_cache
-import subprocess
 import json
+import io
+import csv
+import time
 import sys
+import atexit
+import threading
+from collections import deque
+import zstandard as zstd
 import requests 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import scraper
 
 # Load environment variables from a .env file
 load_dotenv()
 
 # Database Setup 
-def init_db():
+def _ensure_schema(pool):
+    """Creates the logs table once, when the connection pool is first built."""
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS logs (
+                    id SERIAL PRIMARY KEY,
+                    case_type TEXT,
+                    case_number TEXT,
+                    filing_year TEXT,
+                    timestamp TIMESTAMP,
+                    raw_response BYTEA
+                )
+            """)
+            # Tables created before raw_response was compressed stored it as TEXT. Existing
+            # rows are kept as plain UTF-8 bytes; new rows are zstd frames (magic 28 B5 2F FD).
+            cursor.execute("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = 'logs' AND column_name = 'raw_response'
+            """)
+            column = cursor.fetchone()
+            if column and column[0] == "text":
+                cursor.execute("ALTER TABLE logs ALTER COLUMN raw_response TYPE BYTEA USING convert_to(raw_response, 'UTF8')")
+        conn.commit()
+    finally:
+        pool.putconn(conn)
+
+@st.cache_resource(show_spinner=False)
+def get_db_pool():
     """
-    Initializes a PostgreSQL database connection and creates a table for logging queries.
-    Database credentials are loaded from environment variables.
+    Builds a single PostgreSQL connection pool for the whole server process.
+    Cached with st.cache_resource so Streamlit reruns reuse the same pool instead of
+    reconnecting on every query. Database credentials are loaded from environment variables.
+    Connection errors are raised (and therefore not cached), so the next query retries.
     """
+    pool = ThreadedConnectionPool(
+        1, 8,
+        host=os.getenv("PG_HOST"),
+        database=os.getenv("PG_DB"),
+        user=os.getenv("PG_USER"),
+        password=os.getenv("PG_PASSWORD")
+    )
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("PG_HOST"),
-            database=os.getenv("PG_DB"),
-            user=os.getenv("PG_USER"),
-            password=os.getenv("PG_PASSWORD")
-        )
-        cursor = conn.cursor()
-        
-        # Create the logs table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS logs (
-                id SERIAL PRIMARY KEY,
-                case_type TEXT,
-                case_number TEXT,
-                filing_year TEXT,
-                timestamp TIMESTAMP,
-                raw_response TEXT
-            )
-        """)
-        conn.commit()
-        cursor.close()
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Failed to connect to PostgreSQL: {e}")
-        st.info("Please ensure your PostgreSQL server is running and the environment variables (PG_HOST, PG_DB, PG_USER, PG_PASSWORD) are set correctly.")
-        return None
+        _ensure_schema(pool)
+    except psycopg2.Error:
+        pool.closeall()
+        raise
+    return pool
 
-def log_query(case_type, case_number, filing_year, raw_response):
-    """Logs the user query and raw HTML response to the PostgreSQL database."""
-    conn = init_db()
-    if conn:
-        cursor = conn.cursor()
+# CSV over COPY is PostgreSQL's bulk-ingest path; \N marks NULL so empty strings stay empty
+COPY_LOGS_SQL = r"COPY logs (case_type, case_number, filing_year, timestamp, raw_response) FROM STDIN WITH (FORMAT csv, DELIMITER E'\t', NULL '\N')"
+COPY_NULL = "\\N"
+
+class QueryLogWriter:
+    """
+    Buffers query log rows in memory and writes them to PostgreSQL in batches with COPY from
+    a background thread, so a search never waits on a database round-trip.
+    Rows are flushed every FLUSH_INTERVAL seconds, or sooner once FLUSH_SIZE rows are queued.
+    The raw HTML is zstd-compressed on the writer thread before it is sent.
+    """
+
+    FLUSH_INTERVAL = 2.0
+    FLUSH_SIZE = 50
+    MAX_BUFFERED = 1000
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Serialises flushes (writer thread vs. atexit); the compressor is not thread-safe
+        self._flush_lock = threading.Lock()
+        self._compressor = zstd.ZstdCompressor(level=10)
+        self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def add(self, row):
+        """Queues one (case_type, case_number, filing_year, timestamp, raw_response) row."""
+        with self._lock:
+            self._buffer.append(row)
+            self._trim()
+            full = len(self._buffer) >= self.FLUSH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def _trim(self):
+        # Drops the oldest rows if the database stays unreachable long enough for the
+        # buffer to fill up. Caller holds self._lock.
+        while len(self._buffer) > self.MAX_BUFFERED:
+            self._buffer.popleft()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the writer alive; _flush has already re-queued the rows
+                print(f"Query log writer error: {e}", file=sys.stderr)
+
+    def _compress(self, raw_response):
+        """Returns raw_response as a zstd frame in bytea hex input format, for COPY."""
+        if raw_response is None:
+            return COPY_NULL
+        return "\\x" + self._compressor.compress(raw_response.encode("utf-8")).hex()
+
+    def _copy_buffer(self, rows):
+        """Renders rows as the tab-separated CSV that COPY_LOGS_SQL reads."""
+        buf = io.StringIO()
+        writer = csv.writer(buf, dialect="excel-tab", lineterminator="\n")
+        for case_type, case_number, filing_year, timestamp, raw_response in rows:
+            writer.writerow([
+                COPY_NULL if case_type is None else case_type,
+                COPY_NULL if case_number is None else case_number,
+                COPY_NULL if filing_year is None else filing_year,
+                timestamp.isoformat(),
+                self._compress(raw_response),
+            ])
+        buf.seek(0)
+        return buf
+
+    def flush(self):
+        """Writes every queued row with a single COPY."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        if not rows:
+            return
+
+        conn = None
         try:
-            cursor.execute(
-                "INSERT INTO logs (case_type, case_number, filing_year, timestamp, raw_response) VALUES (%s, %s, %s, %s, %s)",
-                (case_type, case_number, filing_year, datetime.now(), raw_response)
-            )
+            # Inside the try: with no idle connection the pool connects, which fails while
+            # the database is down
+            conn = self._pool.getconn()
+            buf = self._copy_buffer(rows)
+            with conn.cursor() as cursor:
+                cursor.copy_expert(COPY_LOGS_SQL, buf)
             conn.commit()
-            st.success("Query logged to PostgreSQL successfully.")
-        except psycopg2.Error as e:
-            st.error(f"Failed to log data to PostgreSQL: {e}")
-            conn.rollback()
+        except Exception as e:
+            print(f"Failed to log {len(rows)} queries to PostgreSQL: {e}", file=sys.stderr)
+            if conn is not None and not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError)):
+                # The database is unreachable: put the rows back for the next flush
+                with self._lock:
+                    self._buffer.extendleft(reversed(rows))
+                    self._trim()
+            else:
+                # Anything else (e.g. a DataError from one bad row) would fail the same way
+                # on every retry and hold up all later rows, so the batch is dropped
+                print(f"Dropped {len(rows)} query log rows", file=sys.stderr)
         finally:
-            cursor.close()
-            conn.close()
+            if conn is not None:
+                self._pool.putconn(conn, close=bool(conn.closed))
 
-# Scraping Logic via Subprocess 
+@st.cache_resource(show_spinner=False)
+def get_log_writer():
+    """Starts the background log writer once per server process."""
+    return QueryLogWriter(get_db_pool())
 
-@st.cache_data(show_spinner=True)
-def get_case_types():
+def log_query(case_type, case_number, filing_year, raw_response):
+    """Queues the user query and raw HTML response for logging to the PostgreSQL database."""
+    try:
+        writer = get_log_writer()
+    except psycopg2.OperationalError as e:
+        st.error(f"Failed to connect to PostgreSQL: {e}")
+        st.info("Please ensure your PostgreSQL server is running and the environment variables (PG_HOST, PG_DB, PG_USER, PG_PASSWORD) are set correctly.")
+        return
+    except psycopg2.Error as e:
+        # e.g. InsufficientPrivilege when the logs table needs migrating and PG_USER does not own it
+        st.error(f"Failed to set up the PostgreSQL logs table: {e}")
+        return
+
+    writer.add((case_type, case_number, filing_year, datetime.now(), raw_response))
+    st.success("Query queued for logging to PostgreSQL.")
+
+# Scraping Logic 
+
+DEFAULT_CASE_TYPES = ["W.P.(C)", "C.R.P.", "C.S.(OS)", "CRL.M.C."]
+
+# The case-type dropdown changes rarely, so the scraped list is kept on disk between restarts
+CASE_TYPES_CACHE_PATH = os.path.join(os.path.dirname(__file__), "case_types.json")
+CASE_TYPES_TTL = 7 * 24 * 60 * 60  # seconds
+
+def _read_case_types_cache():
+    """Returns the on-disk case-type cache as {"ts": ..., "types": [...]}, or None if missing or unreadable."""
+    try:
+        with open(CASE_TYPES_CACHE_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+        if isinstance(cached.get("ts"), (int, float)) and isinstance(cached.get("types"), list):
+            return cached
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+def _write_case_types_cache(types):
+    """Atomically replaces the on-disk case-type cache."""
+    tmp_path = f"{CASE_TYPES_CACHE_PATH}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ts": time.time(), "types": types}, f)
+        os.replace(tmp_path, CASE_TYPES_CACHE_PATH)
+    except OSError as e:
+        st.warning(f"Could not save case types to {CASE_TYPES_CACHE_PATH}: {e}")
+
+def _scrape_case_types():
     """
-    Calls the scraper.py script as a subprocess to get case types.
-    The result is cached to avoid calling the script on every page refresh.
+    Calls the scraper in-process to get case types.
+    Returns None (after reporting the error) if the scrape fails.
     """
     try:
-        SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "scraper.py")
-
-        result = subprocess.run(
-            [sys.executable, SCRIPT_PATH, "get_types"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        output = json.loads(result.stdout)
+        output = scraper.get_case_types()
         
         if "error" in output:
             st.error(f"Scraper error: {output['error']}")
             if 'traceback' in output:
                 st.code(output['traceback'], language="python")
-            return ["W.P.(C)", "C.R.P.", "C.S.(OS)", "CRL.M.C."]
+            return None
         
         types = output.get("result")
         if not isinstance(types, list):
             st.error("Scraper returned an invalid format for case types.")
-            return ["W.P.(C)", "C.R.P.", "C.S.(OS)", "CRL.M.C."]
+            return None
         
         return types
-    except subprocess.CalledProcessError as e:
-        st.error(f"Subprocess failed:\nSTDOUT:\n{e.stdout}\nSTDERR:\n{e.stderr}")
-        return ["W.P.(C)", "C.R.P.", "C.S.(OS)", "CRL.M.C."]
     except Exception as e:
         st.error(f"An unexpected error occurred while getting case types: {e}")
-        return ["W.P.(C)", "C.R.P.", "C.S.(OS)", "CRL.M.C."]
+        return None
 
-def fetch_case_data(case_type, case_number, filing_year):
+@st.cache_data(show_spinner=True)
+def get_case_types():
     """
-    Calls the scraper.py script as a subprocess to scrape case data.
+    Returns the case types from the on-disk cache while it is younger than CASE_TYPES_TTL,
+    and only scrapes the court website once it has expired.
+    The result is also cached in memory to avoid reading the file on every page refresh.
     """
+    cached = _read_case_types_cache()
+    if cached and time.time() - cached["ts"] < CASE_TYPES_TTL:
+        return cached["types"]
+
+    types = _scrape_case_types()
+    if types is None:
+        # A stale list is still better than the hard-coded defaults
+        return cached["types"] if cached else DEFAULT_CASE_TYPES
+
+    _write_case_types_cache(types)
+    return types
+
+def refresh_case_types():
+    """
+    Re-scrapes the case types, bypassing both the on-disk and in-memory caches.
+    Returns True if the cached list was replaced.
+    """
+    types = _scrape_case_types()
+    if types is None:
+        return False
+    _write_case_types_cache(types)
+    get_case_types.clear()
+    return True
+
+class CaseFetchError(Exception):
+    """Raised inside the cached scrape so that failed searches are not cached."""
+
+    def __init__(self, details):
+        super().__init__(details.get("error"))
+        self.details = details
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_case_data_cached(case_type, case_number, filing_year, nonce=0, use_cache=True):
+    """
+    Calls the scraper in-process to scrape case data.
+    Court data changes at most daily, so identical searches within an hour reuse the result;
+    a different nonce forces a fresh scrape, and use_cache=False also skips the scraper's disk cache.
+    """
+    output = scraper.scrape_case_data(
+        case_type, case_number, filing_year, use_cache=use_cache, include_raw=True
+    )
+
+    if "error" in output:
+        error_message = output.get('error', 'An unknown error occurred.')
+        traceback_str = output.get('traceback', '')
+        raise CaseFetchError({"error": error_message, "traceback": traceback_str})
+    
+    return output["result"], output["raw_response"]
+
+def fetch_case_data(case_type, case_number, filing_year, force_refresh=False):
+    """
+    Returns (parsed_data, raw_response) for a case, or ({"error": ...}, None) on failure.
+    force_refresh bypasses the cached result for this and later searches in the session.
+    """
+    if force_refresh:
+        # The result cache is shared by all sessions, so the nonce must be unique to this
+        # refresh; a per-session counter would collide with other sessions' refreshes
+        st.session_state["fetch_nonce"] = time.time_ns()
     try:
-        SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "scraper.py")
-        
-        
-        result = subprocess.run(
-            [sys.executable, SCRIPT_PATH, "search", case_type, case_number, filing_year],
-            capture_output=True,
-            text=True,
-            check=True
+        return _fetch_case_data_cached(
+            case_type, case_number, filing_year, st.session_state.get("fetch_nonce", 0), use_cache=not force_refresh
         )
-        
-        output = json.loads(result.stdout)
-
-        if "error" in output:
-            error_message = output.get('error', 'An unknown error occurred.')
-            traceback_str = output.get('traceback', '')
-            return {"error": error_message, "traceback": traceback_str}, None
-        
-        return output["result"], output["raw_response"]
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Subprocess failed with exit code {e.returncode}.\n\nSTDOUT:\n{e.stdout}\nSTDERR:\n{e.stderr}"}, None
+    except CaseFetchError as e:
+        return e.details, None
     except Exception as e:
         return {"error": str(e)}, None
 
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """
+    Shared HTTP session so PDF downloads reuse keep-alive connections to the court website.
+    Rate limiting and transient server errors are retried with exponential backoff.
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=8, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def download_pdf(pdf_url):
+    """
+    Downloads a PDF, streaming the body in chunks.
+    Cached by URL so the reruns triggered by each click don't fetch it again.
+    """
+    with get_http_session().get(pdf_url, stream=True, timeout=10) as response:
+        response.raise_for_status()
+        return b"".join(response.iter_content(chunk_size=64 * 1024))
+
 def render_case_details(data):
-    """Renders the parsed case details and PDF links."""
+    """
+    Renders the parsed case details and PDF links.
+    PDFs are only downloaded once the user asks for them.
+    """
     st.header("Case Details")
     st.markdown(f"**Parties:** {data['parties_names']}")
     st.markdown(f"**Filing Date:** {data['filing_date']}")
@@ -141,27 +372,29 @@ def render_case_details(data):
     
     st.header("Orders & Judgments")
     if data['pdf_links']:
+        requested = st.session_state.setdefault("requested_pdfs", set())
         for i, pdf_info in enumerate(data['pdf_links']):
             date = pdf_info.get('date', f"Order {i+1}")
             pdf_url = pdf_info.get('pdf_url')
             
             if pdf_url:
                 st.markdown(f"- **{date}:** [View PDF]({pdf_url})")
-                try:
-                    # Add a download button for each PDF
-                    response = requests.get(pdf_url)
-                    if response.status_code == 200:
+                if pdf_url not in requested:
+                    if st.button(f"Prepare download of {os.path.basename(pdf_url)}", key=f"prepare_pdf_{i}"):
+                        requested.add(pdf_url)
+                if pdf_url in requested:
+                    try:
+                        # Add a download button once the PDF has been fetched
                         st.download_button(
                             label=f"Download {os.path.basename(pdf_url)}",
-                            data=response.content,
+                            data=download_pdf(pdf_url),
                             file_name=f"order_{date.replace('/', '-')}.pdf",
                             mime="application/pdf",
                             key=f"download_pdf_{i}"
                         )
-                    else:
-                        st.markdown(f"*(Could not download PDF from {pdf_url})*")
-                except requests.exceptions.RequestException as e:
-                    st.markdown(f"*(Error downloading PDF: {e})*")
+                    except requests.exceptions.RequestException as e:
+                        requested.discard(pdf_url)
+                        st.markdown(f"*(Error downloading PDF: {e})*")
             else:
                 st.markdown(f"- **{date}:** No PDF link available.")
     else:
@@ -188,22 +421,34 @@ def main():
         case_type = st.selectbox("Case Type", options=case_types)
         case_number = st.text_input("Case Number")
         filing_year = st.text_input("Filing Year", placeholder="e.g., 2024")
+        force_refresh = st.checkbox("Force refresh", help="Ignore results cached in the last hour and scrape the court website again.")
         submit_button = st.form_submit_button("Search Case")
     
+    if st.sidebar.button("Refresh case types"):
+        with st.spinner("Refreshing case types..."):
+            refreshed = refresh_case_types()
+        if refreshed:
+            st.rerun()
+    
     if submit_button and case_number and filing_year:
         with st.spinner("Fetching case data..."):
-            parsed_data, raw_response = fetch_case_data(case_type, case_number, filing_year)
+            parsed_data, raw_response = fetch_case_data(case_type, case_number, filing_year, force_refresh)
             
             if parsed_data and not parsed_data.get("error"):
                 log_query(case_type, case_number, filing_year, raw_response)
                 
                 st.success("Case data fetched successfully!")
-                render_case_details(parsed_data) 
+                # Kept in the session so the case stays on screen across download clicks
+                st.session_state["case_details"] = parsed_data
                 
             else:
+                st.session_state.pop("case_details", None)
                 st.error(f"Error fetching data: {parsed_data.get('error', 'Unknown error')}")
                 if 'traceback' in parsed_data:
                     st.code(parsed_data['traceback'], language="python")
+    
+    if "case_details" in st.session_state:
+        render_case_details(st.session_state["case_details"])
                 
     st.sidebar.markdown("---")
     st.sidebar.info("This application is for demonstration purposes only. The accuracy of the data depends on the court's website structure.")
@@ -1,12 +1,24 @@
 import re
-from urllib.parse import urljoin
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlsplit
+from playwright.async_api import async_playwright
+from lxml import etree, html as lxml_html
+import requests
 
 import sys
 import asyncio
 import json
+import orjson
 import traceback
+import threading
+import queue
+import base64
+import gzip
+import os
+import time
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
@@ -15,40 +27,436 @@ if sys.platform.startswith("win"):
 BASE_URL            = "https://delhihighcourt.nic.in"
 SEARCH_PAGE_URL     = f"{BASE_URL}/app/get-case-type-status"
 
+# Successful search results are cached here so repeat searches skip the browser
+RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".case_cache.sqlite3")
+RESPONSE_CACHE_TTL  = 24 * 60 * 60  # seconds
+
 # Selectors on that page 
 CASE_TYPE_SELECT    = "#case_type"
 CASE_NO_INPUT       = "#case_number"  
 CASE_YEAR_INPUT     = "#case_year"   
 SUBMIT_BUTTON       = "#search"       
 RESULTS_TABLE       = "table#caseTable" 
+ERROR_BANNER        = ".alert-danger"
 
 
 CAPTCHA_CODE_SELECTOR = "#captcha-code"
 CAPTCHA_INPUT_SELECTOR = "#captchaInput"
 
+# Reads the CAPTCHA code and types it into the input in a single browser call,
+# firing the same input event that page.fill would
+SOLVE_CAPTCHA_JS = """([codeSelector, inputSelector]) => {
+    const code = document.querySelector(codeSelector).innerText;
+    const input = document.querySelector(inputSelector);
+    input.value = code;
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    return code;
+}"""
+
+# Finds the "Last Date: DD/MM/YYYY" (filing date) and "NEXT DATE: DD/MM/YYYY" or
+# "NEXT DATE: NA" (next hearing date) markers of a listing cell in one scan
+_RE_LISTING_DATES = re.compile(
+    r"Last Date: (?P<last>\d{2}/\d{2}/\d{4})"
+    r"|NEXT DATE: (?:(?P<next>\d{2}/\d{2}/\d{4})|(?P<next_na>NA))"
+)
+
+# How long to wait for a search to produce results or an error banner (ms)
+RESULTS_TIMEOUT = 15_000
+
+# Marks the results table's current rows and any error banners already on the page, so
+# that ones drawn by the search can be told apart; the table (with its "no data" row) is
+# on the page before any search runs, and so may be placeholder or CSS-hidden alerts
+MARK_STALE_JS = """([rowsSelector, bannerSelector]) => {
+    document.querySelectorAll(`${rowsSelector}, ${bannerSelector}`).forEach(el => { el.dataset.stale = '1'; });
+}"""
+
+# Polled after submitting: truthy once the table has been redrawn or a new, visible error
+# banner with text appears, carrying the banner's text in the latter case
+RESULTS_OR_ERROR_JS = """([rowsSelector, bannerSelector]) => {
+    for (const banner of document.querySelectorAll(bannerSelector)) {
+        const text = banner.innerText.trim();
+        if (!banner.dataset.stale && banner.offsetParent !== null && text) {
+            return {error: text};
+        }
+    }
+    const drawn = [...document.querySelectorAll(rowsSelector)].some(tr => !tr.dataset.stale);
+    return drawn && {error: null};
+}"""
+
+# Text the court website shows when a search matches nothing
+NO_CASE_MARKERS = ("no data available", "no such record", "case not found")
+
+# Runs in the browser over the results table's rows: returns each row's cell texts and the
+# href of the "Orders" link in its second cell (if any)
+RESULT_ROWS_JS = """rows => rows.map(tr => {
+    const links = tr.cells.length > 1 ? [...tr.cells[1].querySelectorAll('a[href]')] : [];
+    const orders = links.find(a => /orders/i.test(a.textContent));
+    return {cells: [...tr.cells].map(td => td.innerText), orders: orders ? orders.href : null};
+})"""
+
+# Assets and trackers the scraper never needs; requests for them are aborted
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "hotjar.com", "doubleclick.net")
+
+# Only the first result's PDFs are shown, so by default only its Orders page is fetched;
+# later rows in "all_results" keep their orders_link but have empty pdf_links
+MAX_ORDERS_FETCH = 1
+# How many Orders pages are fetched in parallel for one search
+ORDERS_FETCH_CONCURRENCY = 5
+# How many searches scrape_cases runs at once; each holds its own browser context
+SEARCH_CONCURRENCY = 4
+# Browser contexts kept for reuse; searches beyond this many wait for a free one
+CONTEXT_POOL_SIZE = 4
+# Warm search pages older than this are reloaded before use, as their court session,
+# form token and CAPTCHA may have expired while the context sat idle (seconds)
+WARM_PAGE_MAX_AGE = 5 * 60
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium and a bounded pool of reusable browser contexts.
+
+    Contexts are checked out per scrape and have their pages closed and cookies cleared
+    when returned, so each scrape starts a fresh court session without paying for a new
+    context. Only `size` contexts exist at once; further acquire() calls wait.
+
+    Each context also keeps one warm page: the search page used by a scrape is sent back
+    to SEARCH_PAGE_URL in the background when the context is released, so the next scrape
+    on that context usually finds the form already loaded.
+    Must be used from the BrowserWorker's event loop.
+    """
+
+    def __init__(self, size=CONTEXT_POOL_SIZE):
+        self.size = size
+        self._playwright = None
+        self._browser = None
+        self._idle = []
+        # context -> (page, navigation task, monotonic time the reload started) for pages
+        # being reloaded to the search form
+        self._warm = {}
+        # context -> page handed out by search_page() during the current checkout
+        self._search_pages = {}
+        # Created lazily so they belong to the worker loop
+        self._slots = None
+        self._lock = None
+
+    async def _get_browser(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            if self._browser is None or not self._browser.is_connected():
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._idle = []
+                self._drop_warm_pages()
+        return self._browser
+
+    async def acquire(self):
+        """Checks out a context, creating one if none are idle."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        await self._slots.acquire()
+        try:
+            browser = await self._get_browser()
+            if self._idle:
+                return self._idle.pop()
+            context = await browser.new_context()
+            await context.route("**/*", _block_assets)
+            return context
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def search_page(self, context):
+        """
+        Returns a page of context showing the search form, reusing the context's warm page
+        when its reload succeeded and opening a new one otherwise. A warm page older than
+        WARM_PAGE_MAX_AGE is loaded again with a fresh session first.
+        """
+        page = None
+        warm = self._warm.pop(context, None)
+        if warm is not None and await warm[1]:
+            page = warm[0]
+            if time.monotonic() - warm[2] > WARM_PAGE_MAX_AGE:
+                await context.clear_cookies()
+                if not await _load_search_form(page):
+                    await page.close()
+                    page = None
+        if page is None:
+            page = await context.new_page()
+            await page.goto(SEARCH_PAGE_URL, wait_until="domcontentloaded")
+        self._search_pages[context] = page
+        return page
+
+    async def release(self, context):
+        """Resets a context and returns it to the pool (or closes it if it can't be reused)."""
+        keep = self._search_pages.pop(context, None)
+        try:
+            if context.browser is self._browser and self._browser.is_connected():
+                for page in context.pages:
+                    if page is not keep:
+                        await page.close()
+                await context.clear_cookies()
+                if keep is not None and not keep.is_closed():
+                    # Reloaded off the critical path; the cleared cookies give it a new session
+                    task = asyncio.get_running_loop().create_task(_load_search_form(keep))
+                    self._warm[context] = (keep, task, time.monotonic())
+                self._idle.append(context)
+            else:
+                await context.close()
+        except Exception as e:
+            print(f"Discarding browser context: {e}", file=sys.stderr)
+        finally:
+            self._slots.release()
+
+    def _drop_warm_pages(self):
+        for _, task, _ in self._warm.values():
+            task.cancel()
+        self._warm = {}
+        self._search_pages = {}
+
+    async def close(self):
+        self._drop_warm_pages()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+            self._idle = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+class BrowserWorker:
+    """
+    Runs all Playwright work on one asyncio event loop in a dedicated thread, against
+    one long-lived BrowserPool.
+
+    Streamlit runs every session on its own thread, so callers submit coroutines to
+    this worker instead of starting a new driver (or a new Python process) per call.
+    Concurrent calls interleave on the loop while they wait on the network.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="playwright", daemon=True)
+        self._thread.start()
+        self.pool = BrowserPool()
+
+    def submit(self, coro_fn, *args):
+        """Schedules coro_fn(pool, *args) on the worker loop and returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro_fn(self.pool, *args), self._loop)
+
+    def run(self, coro_fn, *args):
+        """Runs coro_fn(pool, *args) on the worker loop and returns its result."""
+        return self.submit(coro_fn, *args).result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Returns the process-wide BrowserWorker, creating it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = BrowserWorker()
+        return _worker
+
+
+class ResponseCache:
+    """
+    On-disk cache of successful scrape results, keyed by (case_type, case_number, filing_year).
+    Court data changes at most daily, so repeat searches within the TTL skip the browser.
+    Backed by SQLite, which handles locking between threads and processes; cache failures
+    are reported and otherwise ignored.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, ts REAL NOT NULL, output TEXT NOT NULL)")
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_ts ON responses (ts)")
+        except sqlite3.Error as e:
+            print(f"Response cache unavailable: {e}", file=sys.stderr)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _key(query):
+        return "|".join(query)
+
+    def get(self, query):
+        """Returns the cached output for query if it is younger than the TTL, else None."""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT ts, output FROM responses WHERE key = ?", (self._key(query),)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Reading the response cache failed: {e}", file=sys.stderr)
+            return None
+        if row is None or time.time() - row[0] >= self.ttl:
+            return None
+        return json.loads(row[1])
+
+    def put(self, query, output):
+        """
+        Caches output for query, unless it is an error, and deletes expired entries so the
+        file (whose rows hold whole results pages) does not grow without bound.
+        """
+        if "error" in output:
+            return
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM responses WHERE ts < ?", (now - self.ttl,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, ts, output) VALUES (?, ?, ?)",
+                    (self._key(query), now, json.dumps(output, ensure_ascii=False))
+                )
+        except sqlite3.Error as e:
+            print(f"Writing the response cache failed: {e}", file=sys.stderr)
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """Returns the process-wide ResponseCache, creating it on first use."""
+    global _response_cache
+    with _worker_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
 
 def get_case_types():
     """
     Scrape the case-type dropdown and return a list of values,
     like ['W.P.(C)', 'CRL.M.C.', ...].
+    The dropdown is part of the server-rendered form, so it is read with a plain HTTP GET;
+    the browser is only used if the options are missing from the static HTML.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        try:
-            page.goto(SEARCH_PAGE_URL)
-            page.wait_for_selector(CASE_TYPE_SELECT)
-
-            
-            values = page.eval_on_selector_all(
-                f"{CASE_TYPE_SELECT} option",
-                "opts => opts.map(o => o.value).filter(v => v)"
-            )
-            browser.close()
+    try:
+        # Streamed so that reading stops as soon as the dropdown has been parsed
+        with requests.get(SEARCH_PAGE_URL, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            values = parse_case_type_options(response.iter_content(chunk_size=16 * 1024))
+        if values:
             return {"result": values}
-        except Exception as e:
-            tb_str = traceback.format_exc()
-            return {"error": str(e), "traceback": tb_str}
+        print("No case types in the static search page, falling back to the browser", file=sys.stderr)
+    except requests.RequestException as e:
+        print(f"Fetching case types over HTTP failed, falling back to the browser: {e}", file=sys.stderr)
+    return get_worker().run(_get_case_types)
+
+
+def parse_case_type_options(chunks):
+    """
+    Returns the non-empty option values of the case-type dropdown, incrementally parsing
+    the search page HTML from an iterable of chunks and stopping once the dropdown is complete.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag="select")
+    select_id = CASE_TYPE_SELECT.lstrip("#")
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.get("id") == select_id:
+                return [v for v in element.xpath(".//option/@value") if v]
+    return []
+
+
+def _absolute_url(href, base=BASE_URL):
+    """
+    Resolves href against the court website. Absolute and root-relative links (nearly all
+    of them) are handled with plain string checks; only the rest go through urljoin.
+    """
+    if href.startswith(("http://", "https://")):
+        return href
+    if href.startswith("/") and not href.startswith("//"):
+        return base + href
+    return urljoin(base, href)
+
+
+def _clean_text(text):
+    """Collapses runs of whitespace (including innerText line breaks) into single spaces."""
+    return " ".join(text.split())
+
+
+def _parse_listing_dates(listing_info_text):
+    """
+    Returns (filing_date, next_hearing_date) from a results row's listing cell.
+    The first date found for each wins; a next hearing date of "NA" is only used when
+    no actual date is listed. Missing values are "Not found".
+    """
+    filing_date = "Not found"
+    next_hearing_date = "Not found"
+    for match in _RE_LISTING_DATES.finditer(listing_info_text):
+        if match["last"]:
+            if filing_date == "Not found":
+                filing_date = match["last"]
+        elif match["next"]:
+            if next_hearing_date in ("Not found", "NA"):
+                next_hearing_date = match["next"]
+        elif next_hearing_date == "Not found":
+            next_hearing_date = "NA" # Explicitly set if not available
+    return filing_date, next_hearing_date
+
+
+async def _block_assets(route):
+    """Route handler that aborts requests for BLOCKED_RESOURCE_TYPES or to BLOCKED_HOSTS."""
+    request = route.request
+    host = urlsplit(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _load_search_form(page):
+    """Navigates page to the search form, returning False instead of raising on failure."""
+    try:
+        await page.goto(SEARCH_PAGE_URL, wait_until="domcontentloaded")
+        return True
+    except Exception as e:
+        print(f"Reloading the search form failed: {e}", file=sys.stderr)
+        return False
+
+
+async def _get_case_types(pool):
+    context = await pool.acquire()
+    try:
+        page = await pool.search_page(context)
+        await page.wait_for_selector(CASE_TYPE_SELECT)
+
+        
+        values = await page.eval_on_selector_all(
+            f"{CASE_TYPE_SELECT} option",
+            "opts => opts.map(o => o.value).filter(v => v)"
+        )
+        return {"result": values}
+    except Exception as e:
+        tb_str = traceback.format_exc()
+        return {"error": str(e), "traceback": tb_str}
+    finally:
+        await pool.release(context)
+
+
+# Text nodes under an element, leaving out script and style bodies (and comments), as
+# BeautifulSoup's get_text does
+_VISIBLE_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+
+def _element_text(el, separator=""):
+    """lxml equivalent of BeautifulSoup's get_text(separator, strip=True)."""
+    return separator.join(t.strip() for t in _VISIBLE_TEXT_XPATH(el) if t.strip())
 
 
 def parse_all_tables(html, min_rows=1):
@@ -60,236 +468,427 @@ def parse_all_tables(html, min_rows=1):
       }
     Only tables with > `min_rows` data-rows are returned.
     """
-    soup = BeautifulSoup(html, "html.parser")
     tables = []
+    if not html or not html.strip():
+        return tables
+
+    doc = lxml_html.fromstring(html)
     
-    for table_el in soup.find_all("table"):
+    for table_el in doc.iter("table"):
         # 1) Collect all rows
-        trs = table_el.find_all("tr")
+        trs = list(table_el.iter("tr"))
         if len(trs) <= min_rows:
             continue
         
         # 2) Determine headers
         # Prefer <th>, else use first row's <td>
-        ths = table_el.find_all("th")
+        ths = list(table_el.iter("th"))
         if ths:
-            headers = [th.get_text(strip=True) for th in ths]
+            headers = [_element_text(th) for th in ths]
             data_trs = trs
         else:
-            first_tds = trs[0].find_all("td")
-            headers = [td.get_text(strip=True) for td in first_tds]
+            headers = [_element_text(td) for td in trs[0].iter("td")]
             data_trs = trs[1:]
         
         # 3) Extract each row's cells
         rows = []
         for tr in data_trs:
-            tds = tr.find_all("td")
-            if not tds:
-                continue
-            row = [td.get_text(separator=" ", strip=True) for td in tds]
-            rows.append(row)
+            row = [_element_text(td, " ") for td in tr.iter("td")]
+            if row:
+                rows.append(row)
         
         if rows:
             tables.append({"headers": headers, "rows": rows})
     
     return tables
 
+# Compiled once so each Orders page is parsed without re-compiling the expressions.
+# Rows come from the first table with the ID "caseTable", as on the results page. Raw server
+# HTML often has no <tbody> (lxml does not add one), so rows are matched anywhere in the
+# table; header rows are skipped by the cell-count check in _order_links_from_rows.
+_ORDER_ROWS_XPATH = etree.XPath("(//table[@id='caseTable'])[1]//tr")
+_ROW_CELLS_XPATH  = etree.XPath(".//td")
+
+
 def parse_order_links(order_html):
     """
     Parses the HTML of the orders/judgments page to extract PDF links and dates.
     Targets the table specifically by its ID "caseTable".
     """
-    soup = BeautifulSoup(order_html, "html.parser")
-    # Target the table specifically by its ID
-    table = soup.find("table", id="caseTable")
-    links = []
+    return _order_links_from_rows(_order_table_rows(order_html))
+
+
+def _order_table_rows(order_html):
+    """Returns the rows of the orders page's "caseTable" (str or bytes HTML)."""
+    if not order_html or not order_html.strip():
+        return []
 
-    if not table:
-        return links # No table found with the specified ID
+    doc = lxml_html.fromstring(order_html)
+    # Empty if there is no table with the specified ID
+    return _ORDER_ROWS_XPATH(doc)
 
-    for tr in table.select("tbody tr"):
-        tds = tr.find_all("td")
+
+def _order_links_from_rows(rows):
+    links = []
+    for tr in rows:
+        tds = _ROW_CELLS_XPATH(tr)
         if len(tds) >= 3: # Ensure there are enough columns
-            anchor = tds[1].find("a", href=True) 
-            if anchor:
-                href = anchor["href"]
-                pdf_url = urljoin(BASE_URL, href)
-                date = tds[2].get_text(strip=True) 
+            anchor = tds[1].find(".//a[@href]") # First link only, without building a list
+            if anchor is not None:
+                href = anchor.get("href")
+                pdf_url = _absolute_url(href)
+                date = tds[2].text_content().strip()
                 links.append({"date": date, "pdf_url": pdf_url})
     return links
 
 
-def scrape_case_data(case_type: str, case_number: str, filing_year: str):
+def scrape_case_data(case_type: str, case_number: str, filing_year: str, use_cache=True, include_raw=False):
     """
     Automates CAPTCHA solving and scrapes case data, including PDF links from the orders page.
+    Successful results are cached on disk for RESPONSE_CACHE_TTL; use_cache=False forces a
+    fresh scrape (whose result still refreshes the cache).
+    The raw results page HTML is only included in the output when include_raw is set.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False) # Set to headless=False for debugging visibility
-        context = browser.new_context()
-        page = context.new_page()
+    query = (case_type, case_number, filing_year)
+    cache = get_response_cache()
+    output = cache.get(query) if use_cache else None
+    if output is None:
+        output = get_worker().run(_scrape_case_data, *query)
+        cache.put(query, output)
+    return output if include_raw else _without_raw(output)
+
+
+def scrape_cases(queries, concurrency=None, use_cache=True, include_raw=False):
+    """
+    Scrapes several cases concurrently on the shared browser pool.
+    `queries` is an iterable of (case_type, case_number, filing_year) tuples; the results come
+    back in the same order, each shaped like the return value of scrape_case_data.
+    Caching and include_raw behave as in scrape_case_data.
+    """
+    return [output for _, output in iter_scrape_cases(queries, concurrency, use_cache, include_raw)]
+
+
+def iter_scrape_cases(queries, concurrency=None, use_cache=True, include_raw=False):
+    """
+    Like scrape_cases, but yields (query, output) pairs as soon as each result and every
+    result before it are ready, instead of waiting for the whole batch.
+    """
+    queries = [tuple(query) for query in queries]
+    cache = get_response_cache()
+    cached = [cache.get(query) if use_cache else None for query in queries]
+
+    missing = [i for i, output in enumerate(cached) if output is None]
+    finished = queue.Queue()
+    future = None
+    if missing:
+        future = get_worker().submit(
+            _scrape_cases,
+            [queries[i] for i in missing],
+            concurrency or SEARCH_CONCURRENCY,
+            lambda j, output: finished.put((missing[j], output)),
+        )
+        # Wakes the loop below if the batch fails as a whole instead of per query
+        future.add_done_callback(lambda _: finished.put(None))
+
+    # Results finished out of order wait here until everything before them is yielded
+    pending = {}
+    for i, query in enumerate(queries):
+        output = cached[i]
+        while output is None:
+            if i in pending:
+                output = pending.pop(i)
+                cache.put(query, output)
+                break
+            item = finished.get()
+            if item is None:
+                future.result()  # re-raises the batch's exception, if any
+                continue
+            pending[item[0]] = item[1]
+        yield query, output if include_raw else _without_raw(output)
+
+
+def scrape_many(queries, processes=None, concurrency=None, use_cache=True, include_raw=False):
+    """
+    Like scrape_cases, but spreads the queries over several worker processes, each with its
+    own BrowserWorker and browser pool, so parsing and browser work run in parallel.
+    Defaults to half the CPU count, since every process runs its own Chromium; `concurrency`
+    limits the scrapes in flight within each process.
+    """
+    queries = [tuple(query) for query in queries]
+    processes = min(processes or max(1, (os.cpu_count() or 2) // 2), len(queries))
+    if processes <= 1:
+        return scrape_cases(queries, concurrency, use_cache, include_raw)
+
+    # One interleaved chunk per process, so each browser is launched once. Workers are
+    # spawned rather than forked: a forked child would inherit this process's BrowserWorker
+    # without its event-loop thread, and block forever on its first run()
+    results = [None] * len(queries)
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("spawn"), initializer=_init_process_worker
+    ) as executor:
+        futures = {
+            executor.submit(_scrape_chunk, queries[start::processes], concurrency, use_cache, include_raw): start
+            for start in range(processes)
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            results[start::processes] = future.result()
+    return results
+
+
+def _init_process_worker():
+    """ProcessPoolExecutor initializer: starts this process's BrowserWorker up front."""
+    get_worker()
+
+
+def _scrape_chunk(queries, concurrency, use_cache, include_raw):
+    """Runs scrape_cases in a worker process, shutting its browser down afterwards."""
+    global _worker
+    try:
+        return scrape_cases(queries, concurrency, use_cache, include_raw)
+    finally:
+        with _worker_lock:
+            if _worker is not None:
+                _worker.close()
+                _worker = None
+
+
+def _without_raw(output):
+    """Returns output without its raw_response HTML, which is large and rarely needed."""
+    return {key: value for key, value in output.items() if key != "raw_response"}
+
 
+async def _scrape_cases(pool, queries, concurrency, on_result=None):
+    """Scrapes queries concurrently; on_result(index, output) is called as each one finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape_one(index, query):
+        async with semaphore:
+            output = await _scrape_case_data(pool, *query)
+        if on_result is not None:
+            on_result(index, output)
+        return output
+
+    return await asyncio.gather(*(scrape_one(i, query) for i, query in enumerate(queries)))
+
+
+async def _fetch_order_links(context, orders_url, semaphore):
+    """
+    Returns one case's PDF links. The Orders page is first fetched through the context's
+    request API, which shares its cookies but skips rendering; a tab is only opened if the
+    static HTML has no order rows (i.e. the table is filled in by page scripts).
+    """
+    async with semaphore:
+        response = await context.request.get(orders_url)
         try:
-            # 1) Load form
-            page.goto(SEARCH_PAGE_URL)
-            page.wait_for_selector(CASE_TYPE_SELECT)
-
-            # 2) Fill fields
-            page.select_option(CASE_TYPE_SELECT, case_type)
-            page.fill(CASE_NO_INPUT, case_number)
-            page.select_option(CASE_YEAR_INPUT, filing_year) 
-
-            # 3) Extract and solve CAPTCHA
-            page.wait_for_selector(CAPTCHA_CODE_SELECTOR)
-            captcha_text = page.inner_text(CAPTCHA_CODE_SELECTOR)
-            page.fill(CAPTCHA_INPUT_SELECTOR, captcha_text)
-            
-            print(f"CAPTCHA solved: {captcha_text}", file=sys.stderr)
-
-            # 4) Click submit and wait for initial results table
-            page.click(SUBMIT_BUTTON)
-            page.wait_for_timeout(timeout=1000) # Give a small timeout for page to process
-            page.wait_for_selector(RESULTS_TABLE, timeout=60_000) 
-            
-            raw_html_initial_results = page.content() # Get content of the initial results page
-            soup_initial = BeautifulSoup(raw_html_initial_results, "html.parser")
-
-            # Check if page contains known "no case found" markers
-            page_text = soup_initial.get_text(" ", strip=True).lower()
-            if "no data available" in page_text or "no such record" in page_text or "case not found" in page_text:
-                raise ValueError(f"No case found for {case_type} {case_number}/{filing_year}")
-
-
-            # Extract main case details from the initial results page 
-            
-            
-            main_table = soup_initial.find("table", id="caseTable")
-            parties_names = "Not found"
-            filing_date = "Not found"
-            next_hearing_date = "Not found"
-            
-            if main_table:
-                
-                first_row = main_table.select_one("tbody tr")
-                if first_row:
-                    tds = first_row.find_all("td")
-                    if len(tds) >= 4: # Ensure enough columns for the data
-                       
-                        parties_names = tds[2].get_text(" ", strip=True)
-
-                        listing_info_text = tds[3].get_text(" ", strip=True)
-                        
-                        # Regex to find "Last Date: DD/MM/YYYY" for Filing Date
-                        filing_date_match = re.search(r"Last Date: (\d{2}/\d{2}/\d{4})", listing_info_text)
-                        if filing_date_match:
-                            filing_date = filing_date_match.group(1)
-                        
-                        # Regex to find "NEXT DATE: DD/MM/YYYY" for Next Hearing Date
-                        next_date_match = re.search(r"NEXT DATE: (\d{2}/\d{2}/\d{4})", listing_info_text)
-                        if next_date_match:
-                            next_hearing_date = next_date_match.group(1)
-                        elif "NEXT DATE: NA" in listing_info_text:
-                            next_hearing_date = "NA" # Explicitly set if not available
-
-
-            # Iterate through initial results table to find and scrape Orders links for each case 
-            results_list = [] 
-            if main_table:
-                rows = main_table.select("tbody tr")
-                for tr in rows:
-                    tds = tr.find_all("td")
-                    if len(tds) < 4: # Basic check for valid row structure
-                        continue # Skip malformed rows
-
-                    case_sno = tds[0].get_text(strip=True)
-                    case_num_text = tds[1].get_text(" ", strip=True) # This includes the case number and "Orders" link text
-                    case_parties_from_row = tds[2].get_text(" ", strip=True) # Get parties specific to this row
-                    case_listing_info = tds[3].get_text(" ", strip=True)
-
-                    orders_link_el = tds[1].find("a", href=True, string=re.compile("Orders", re.I)) # Find the specific "Orders" link in this row
-                    
-                    pdf_links_for_this_case = []
-                    case_detail_url = None 
-                    
-                    if orders_link_el:
-                        href = orders_link_el["href"]
-                        case_detail_url = urljoin(BASE_URL, href)
-
-                        # Open a new page/tab for the specific case's orders to avoid losing context
-                        case_orders_page = context.new_page()
-                        case_orders_page.goto(case_detail_url)
-                        # Wait for the specific table on the orders page to load
-                        case_orders_page.wait_for_selector("table#caseTable", timeout=10000) 
-                        orders_html_for_this_case = case_orders_page.content()
-                        
-                        # Parse PDF links from the orders page
-                        pdf_links_for_this_case = parse_order_links(orders_html_for_this_case)
-                        
-                        case_orders_page.close() 
-
-                    results_list.append({
-                        "sno": case_sno,
-                        "case_number": case_num_text,
-                        "parties": case_parties_from_row, 
-                        "listing_info": case_listing_info,
-                        "orders_link": case_detail_url, 
-                        "filing_date": filing_date,
-                        "next_hearing_date": next_hearing_date, 
-                        "pdf_links": pdf_links_for_this_case
-                    })
-            
-            # The 'parsed' dictionary will now contain details from the first result (or overall if only one)
-            # and the pdf_links will be from the specific orders page.
-            # If there are multiple results, 'results_list' will hold all parsed data.
-            # For the main display in app.py, we'll use the overall extracted details and the first case's PDFs.
-
-            parsed_main_display = {
-                "parties_names": parties_names,
-                "filing_date": filing_date, 
+            if response.ok:
+                rows = _order_table_rows(await response.body())
+                if rows:
+                    return _order_links_from_rows(rows)
+        finally:
+            await response.dispose()
+
+        orders_page = await context.new_page()
+        try:
+            await orders_page.goto(orders_url, wait_until="domcontentloaded")
+            # Wait for the specific table on the orders page to be in the DOM; only its HTML is read
+            await orders_page.wait_for_selector("table#caseTable", state="attached", timeout=10000)
+            return parse_order_links(await orders_page.content())
+        finally:
+            await orders_page.close()
+
+
+async def _scrape_case_data(pool, case_type, case_number, filing_year):
+    context = await pool.acquire()
+
+    try:
+        # 1) Load form (usually already loaded on the context's warm page)
+        page = await pool.search_page(context)
+        await page.wait_for_selector(CASE_TYPE_SELECT)
+
+        # 2) Fill fields
+        await page.select_option(CASE_TYPE_SELECT, case_type)
+        await page.fill(CASE_NO_INPUT, case_number)
+        await page.select_option(CASE_YEAR_INPUT, filing_year) 
+
+        # 3) Extract and solve CAPTCHA
+        await page.wait_for_selector(CAPTCHA_CODE_SELECTOR)
+        captcha_text = await page.evaluate(SOLVE_CAPTCHA_JS, [CAPTCHA_CODE_SELECTOR, CAPTCHA_INPUT_SELECTOR])
+        
+        print(f"CAPTCHA solved: {captcha_text}", file=sys.stderr)
+
+        # 4) Click submit and wait for whichever comes first: the results table being redrawn,
+        # or an error banner (e.g. a rejected CAPTCHA), so failures return straight away
+        rows_selector = f"{RESULTS_TABLE} tbody tr"
+        await page.evaluate(MARK_STALE_JS, [rows_selector, ERROR_BANNER])
+        await page.click(SUBMIT_BUTTON)
+        outcome = await page.wait_for_function(
+            RESULTS_OR_ERROR_JS, arg=[rows_selector, ERROR_BANNER], timeout=RESULTS_TIMEOUT
+        )
+        banner_error = (await outcome.json_value())["error"]
+        if banner_error:
+            raise ValueError(f"Search failed for {case_type} {case_number}/{filing_year}: {banner_error}")
+        
+        raw_html_initial_results = await page.content() # Get content of the initial results page
+
+        # Extract every results row in one round-trip to the browser instead of
+        # re-parsing the serialized page
+        grid = await page.eval_on_selector_all(rows_selector, RESULT_ROWS_JS)
+
+        # Check the rows' text for known "no case found" markers. Not the raw HTML: inline
+        # scripts and attributes (e.g. DataTables' emptyTable message) can contain them too
+        rows_text = " ".join(cell for row in grid for cell in row["cells"]).lower()
+        if any(marker in rows_text for marker in NO_CASE_MARKERS):
+            raise ValueError(f"No case found for {case_type} {case_number}/{filing_year}")
+
+        # Build one entry per results row in a single pass; the first row also supplies
+        # the main case details shown on the dashboard
+        parties_names = "Not found"
+        filing_date = "Not found"
+        next_hearing_date = "Not found"
+        results_list = [] 
+        for index, row in enumerate(grid):
+            tds = row["cells"]
+            if len(tds) < 4: # Basic check for valid row structure
+                continue # Skip malformed rows
+
+            parties = _clean_text(tds[2]) # Parties specific to this row
+            listing_info_text = _clean_text(tds[3])
+
+            if index == 0:
+                parties_names = parties
+                filing_date, next_hearing_date = _parse_listing_dates(listing_info_text)
+
+            results_list.append({
+                "sno": _clean_text(tds[0]),
+                "case_number": _clean_text(tds[1]), # This includes the case number and "Orders" link text
+                "parties": parties,
+                "listing_info": listing_info_text,
+                "orders_link": row["orders"], # Already absolute, resolved by the browser
+                "filing_date": filing_date,
                 "next_hearing_date": next_hearing_date, 
-                "pdf_links": results_list[0]["pdf_links"] if results_list and results_list[0]["pdf_links"] else []
-            }
+                "pdf_links": []
+            })
+        
+        # Fetch the first MAX_ORDERS_FETCH cases' Orders pages concurrently, a few tabs at a time
+        semaphore = asyncio.Semaphore(ORDERS_FETCH_CONCURRENCY)
+        with_orders = [entry for entry in results_list[:MAX_ORDERS_FETCH] if entry["orders_link"]]
+        fetched = await asyncio.gather(
+            *(_fetch_order_links(context, entry["orders_link"], semaphore) for entry in with_orders),
+            return_exceptions=True
+        )
+        for entry, pdf_links in zip(with_orders, fetched):
+            if isinstance(pdf_links, BaseException):
+                raise pdf_links
+            entry["pdf_links"] = pdf_links
+
+        # The 'parsed' dictionary will now contain details from the first result (or overall if only one)
+        # and the pdf_links will be from the specific orders page.
+        # If there are multiple results, 'results_list' will hold all parsed data.
+        # For the main display in app.py, we'll use the overall extracted details and the first case's PDFs.
+
+        parsed_main_display = {
+            "parties_names": parties_names,
+            "filing_date": filing_date, 
+            "next_hearing_date": next_hearing_date, 
+            "pdf_links": results_list[0]["pdf_links"] if results_list and results_list[0]["pdf_links"] else []
+        }
+
+        # Return the parsed data for the main display and the full list of results.
+        # Callers that need every table on the page can run parse_all_tables on raw_response.
+        return {"result": parsed_main_display, "raw_response": raw_html_initial_results, "all_results": results_list}
+
+    except Exception as e:
+        tb_str = traceback.format_exc()
+        return {"error": str(e), "traceback": tb_str}
+    finally:
+        await pool.release(context)
 
+def _pack_raw(raw_html):
+    """Returns raw HTML gzipped and base64-encoded, for emitting in CLI output."""
+    return base64.b64encode(gzip.compress(raw_html.encode("utf-8"))).decode("ascii")
 
-            tables_from_initial_results = parse_all_tables(raw_html_initial_results, min_rows=1)
 
-            # Return the parsed data for the main display and the full list of results
-            return {"result": parsed_main_display, "tables": tables_from_initial_results, "raw_response": raw_html_initial_results, "all_results": results_list}
+BATCH_QUERY_FIELDS = ("case_type", "case_number", "filing_year")
+
+
+def _read_batch_queries(data):
+    """Parses the batch command's JSON array of query objects into query tuples."""
+    items = orjson.loads(data)
+    if not isinstance(items, list):
+        raise ValueError("batch expects a JSON array of queries")
+    queries = []
+    for item in items:
+        if not isinstance(item, dict) or any(field not in item for field in BATCH_QUERY_FIELDS):
+            raise ValueError(f"Each batch query needs {', '.join(BATCH_QUERY_FIELDS)}: {item!r}")
+        queries.append(tuple(str(item[field]) for field in BATCH_QUERY_FIELDS))
+    return queries
+
+
+def _emit(output):
+    """
+    Writes one JSON document to stdout as UTF-8 bytes, leaving non-ASCII text unescaped
+    so text such as party names is not inflated by \\uXXXX escapes.
+    orjson serialises straight to UTF-8 bytes, several times faster than the json module.
+    """
+    sys.stdout.buffer.write(orjson.dumps(output))
+    sys.stdout.buffer.write(b"\n")
+    sys.stdout.buffer.flush()
 
-        except Exception as e:
-            tb_str = traceback.format_exc()
-            return {"error": str(e), "traceback": tb_str}
-        finally:
-            browser.close()
 
 if __name__ == "__main__":
     try:
         if len(sys.argv) < 2:
-            print(json.dumps({"error": "Usage: <command> [args]"}))
+            _emit({"error": "Usage: <command> [args]"})
             sys.exit(1)
 
         command = sys.argv[1]
         
         if command == "get_types":
             if len(sys.argv) != 2:
-                print(json.dumps({"error": "Usage: get_types"}))
+                _emit({"error": "Usage: get_types"})
                 sys.exit(1)
             output = get_case_types()
-            print(json.dumps(output))
+            _emit(output)
 
         elif command == "search":
-            if len(sys.argv) != 5:
-                print(json.dumps({"error": "Usage: search <CASE_TYPE> <CASE_NO> <YEAR>"}))
+            # --raw adds the results page HTML, gzipped and base64-encoded, as raw_response
+            args = sys.argv[2:]
+            include_raw = "--raw" in args
+            args = [arg for arg in args if arg != "--raw"]
+            if len(args) != 3:
+                _emit({"error": "Usage: search [--raw] <CASE_TYPE> <CASE_NO> <YEAR>"})
+                sys.exit(1)
+            ct, num, year = args
+            output = scrape_case_data(ct, num, year, include_raw=include_raw)
+            if output.get("raw_response") is not None:
+                output["raw_response"] = _pack_raw(output["raw_response"])
+            _emit(output)
+
+        elif command == "batch":
+            # Reads a JSON array of {"case_type", "case_number", "filing_year"} objects from
+            # stdin and writes one JSON line per query, in order, sharing one browser. Each
+            # line is written as soon as its result and every earlier one are ready
+            args = sys.argv[2:]
+            include_raw = "--raw" in args
+            if [arg for arg in args if arg != "--raw"]:
+                _emit({"error": "Usage: batch [--raw] < queries.json"})
                 sys.exit(1)
-            _, _, ct, num, year = sys.argv
-            output = scrape_case_data(ct, num, year)
-            print(json.dumps(output))
-            
+            queries = _read_batch_queries(sys.stdin.buffer.read())
+            for query, output in iter_scrape_cases(queries, include_raw=include_raw):
+                if output.get("raw_response") is not None:
+                    output["raw_response"] = _pack_raw(output["raw_response"])
+                _emit({"query": dict(zip(BATCH_QUERY_FIELDS, query)), **output})
+
         else:
-            print(json.dumps({"error": "Unknown command"}))
+            _emit({"error": "Unknown command"})
             sys.exit(1)
 
     except Exception as e:
         tb_str = traceback.format_exc()
-        print(json.dumps({"error": str(e), "traceback": tb_str}))
+        _emit({"error": str(e), "traceback": tb_str})
         sys.exit(1)
+    finally:
+        if _worker is not None:
+            _worker.close()
 